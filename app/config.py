@@ -4,6 +4,7 @@
 """
 
 import os
+from functools import lru_cache
 from typing import List, Optional
 from pydantic import Field
 
@@ -57,6 +58,12 @@ class Settings(BaseSettings):
         description="Maximum requests per minute per IP"
     )
     
+    redis_url: Optional[str] = Field(
+        default=None,
+        env="REDIS_URL",
+        description="Redis URL (with the redis-cell module) for shared rate limiting"
+    )
+    
     # Logging
     log_level: str = Field(
         default="INFO",
@@ -64,6 +71,13 @@ class Settings(BaseSettings):
         description="Logging level"
     )
     
+    # Request Limits
+    max_upload_size: int = Field(
+        default=5 * 1024 * 1024,
+        env="MAX_UPLOAD_SIZE",
+        description="Largest accepted upload in bytes (413 above it)"
+    )
+    
     # External API Configuration
     request_timeout: int = Field(
         default=10,
@@ -71,6 +85,19 @@ class Settings(BaseSettings):
         description="Timeout for external API requests in seconds"
     )
     
+    summarize_workers: Optional[int] = Field(
+        default=None,
+        env="SUMMARIZE_WORKERS",
+        description="Worker processes for /summarize (defaults to the CPU count, 0 runs it in threads)"
+    )
+    
+    # Deployment
+    root_path: str = Field(
+        default="",
+        env="ROOT_PATH",
+        description="ASGI root path when served behind a path-prefixing proxy"
+    )
+    
     # API Metadata
     api_title: str = "Dev API Vault"
     api_description: str = "A comprehensive collection of developer utilities built with FastAPI"
@@ -93,5 +120,16 @@ def is_development(self) -> bool:
         return self.fastapi_env.lower() == "development"
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the process-wide settings, parsing the environment only once.
+    
+    Use as ``Depends(get_settings)`` in route handlers; call
+    ``get_settings.cache_clear()`` to pick up environment changes in tests.
+    """
+    return Settings()
+
+
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
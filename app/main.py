@@ -5,21 +5,25 @@
 including markdown conversion, QR code generation, image processing, and more.
 """
 
+import asyncio
 import logging
-import time
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, status, HTTPException
-from fastapi.responses import JSONResponse
+from functools import lru_cache
+import orjson
+from fastapi import FastAPI, Request, Depends
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html, get_redoc_html
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request as StarletteRequest
 
 from . import routers, __version__
-from .config import settings
-from .openapi import API_METADATA, get_openapi_tags, get_operation_config, get_secure_operation_config
+from .config import Settings, get_settings, settings
+from .middleware import ContentSizeLimitMiddleware, RateLimitMiddleware
+from .openapi import API_METADATA, get_openapi_tags, get_secure_operation_config
 
 
 # Configure logging
@@ -36,81 +40,57 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Dev API Vault...")
     
-    # Download NLTK data if needed
+    # NLTK data is staged at build time (Dockerfile/build.sh). Load the
+    # tokenizer and stopwords now, in parallel threads, so the first
+    # /summarize request doesn't pay for it.
     try:
-        import nltk
-        import ssl
+        from nltk.tokenize import sent_tokenize
+        await asyncio.gather(
+            asyncio.to_thread(sent_tokenize, "Warm up the tokenizer."),
+            asyncio.to_thread(routers.get_stop_words),
+        )
+        logger.info("NLTK data loaded")
+    except LookupError as e:
+        logger.error(f"NLTK data missing, run `python -m nltk.downloader punkt punkt_tab stopwords`: {e}")
+    
+    # Summarization is CPU-bound; run it in worker processes so it doesn't
+    # hold the GIL against other requests. Spawn rather than fork, since the
+    # event loop and its threads are already running.
+    app.state.summarize_pool = None
+    summarize_workers = os.cpu_count() if settings.summarize_workers is None else settings.summarize_workers
+    if summarize_workers:
+        app.state.summarize_pool = ProcessPoolExecutor(
+            max_workers=summarize_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=routers.init_nlp_worker,
+        )
+    
+    # Build the OpenAPI schema before the first /openapi.json hit
+    if not settings.is_production:
+        openapi_json_bytes()
+    
+    # Share rate limit counters across workers when Redis is configured
+    app.state.redis = None
+    if settings.redis_url:
         try:
-            _create_unverified_https_context = ssl._create_unverified_context
-        except AttributeError:
-            pass
-        else:
-            ssl._create_default_https_context = _create_unverified_https_context
-        
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        logger.info("NLTK data initialized successfully")
-    except Exception as e:
-        logger.error(f"Failed to initialize NLTK data: {e}")
+            import redis.asyncio as aioredis
+            app.state.redis = aioredis.from_url(settings.redis_url)
+            logger.info("Rate limiting backed by Redis")
+        except ImportError:
+            logger.error("REDIS_URL is set but the redis package is not installed")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Dev API Vault...")
+    if app.state.redis is not None:
+        await app.state.redis.close()
+    if app.state.summarize_pool is not None:
+        app.state.summarize_pool.shutdown(wait=False, cancel_futures=True)
+    # Release the word counter's pooled keep-alive connections
+    routers.close_http_session()
 
 
-# Custom exception handler for rate limiting
-class RateLimitExceeded(HTTPException):
-    def __init__(self, detail: str, retry_after: int):
-        super().__init__(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=detail,
-            headers={"Retry-After": str(retry_after)},
-        )
-
-# Rate limiting middleware
-class RateLimiterMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, limit: int = 100, window: int = 3600):
-        super().__init__(app)
-        self.limit = limit
-        self.window = window
-        self.requests = {}
-
-    async def dispatch(self, request: StarletteRequest, call_next):
-        # Skip rate limiting for health checks and docs
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
-            
-        client_ip = request.client.host
-        current_time = int(time.time())
-        
-        # Clean up old entries
-        for ip in list(self.requests.keys()):
-            if current_time - self.requests[ip]["timestamp"] > self.window:
-                del self.requests[ip]
-        
-        # Initialize or update request count
-        if client_ip not in self.requests:
-            self.requests[client_ip] = {"count": 1, "timestamp": current_time}
-        else:
-            self.requests[client_ip]["count"] += 1
-        
-        # Check rate limit
-        if self.requests[client_ip]["count"] > self.limit:
-            retry_after = self.window - (current_time - self.requests[client_ip]["timestamp"])
-            raise RateLimitExceeded(
-                detail=f"Rate limit exceeded. Try again in {retry_after} seconds.",
-                retry_after=retry_after
-            )
-        
-        # Add rate limit headers to response
-        response = await call_next(request)
-        response.headers["X-RateLimit-Limit"] = str(self.limit)
-        response.headers["X-RateLimit-Remaining"] = str(self.limit - self.requests[client_ip]["count"])
-        response.headers["X-RateLimit-Reset"] = str(self.requests[client_ip]["timestamp"] + self.window)
-        
-        return response
-
 # Initialize FastAPI App with enhanced OpenAPI documentation
 app = FastAPI(
     **API_METADATA,
@@ -119,34 +99,64 @@ async def dispatch(self, request: StarletteRequest, call_next):
     openapi_tags=get_openapi_tags(),
     docs_url=None,  # We'll serve custom docs
     redoc_url=None,  # We'll serve custom ReDoc
-    openapi_url="/openapi.json" if not settings.is_production else None,
-    default_response_class=JSONResponse,
+    openapi_url=None,  # Served below from a pre-serialized schema
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
     root_path=settings.root_path or ""
 )
 
-# Serve static files for custom docs
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Serve static files for custom docs, using the CDN assets when they aren't vendored
+if os.path.isdir("static"):
+    app.mount("/static", StaticFiles(directory="static"), name="static")
+    swagger_assets = {
+        "swagger_js_url": "/static/swagger-ui-bundle.js",
+        "swagger_css_url": "/static/swagger-ui.css",
+    }
+    redoc_assets = {"redoc_js_url": "/static/redoc.standalone.js"}
+else:
+    swagger_assets, redoc_assets = {}, {}
+
+# The docs pages are static, so render them once and let clients cache them
+DOCS_CACHE_HEADERS = {"Cache-Control": "public, max-age=86400"}
+SWAGGER_UI_HTML = get_swagger_ui_html(
+    openapi_url="/openapi.json",
+    title=f"{app.title} - Swagger UI",
+    **swagger_assets,
+).body
+REDOC_HTML = get_redoc_html(
+    openapi_url="/openapi.json",
+    title=f"{app.title} - ReDoc",
+    **redoc_assets,
+).body
 
 # Custom docs endpoints
 @app.get("/docs", include_in_schema=False)
 async def custom_swagger_ui_html():
-    return get_swagger_ui_html(
-        openapi_url="/openapi.json",
-        title=f"{app.title} - Swagger UI",
-        swagger_js_url="/static/swagger-ui-bundle.js",
-        swagger_css_url="/static/swagger-ui.css",
-    )
+    return Response(content=SWAGGER_UI_HTML, media_type="text/html", headers=DOCS_CACHE_HEADERS)
 
 @app.get("/redoc", include_in_schema=False)
 async def redoc_html():
-    return get_redoc_html(
-        openapi_url="/openapi.json",
-        title=f"{app.title} - ReDoc",
-        redoc_js_url="/static/redoc.standalone.js",
+    return Response(content=REDOC_HTML, media_type="text/html", headers=DOCS_CACHE_HEADERS)
+
+# Add rate limiting middleware (limit comes from RATE_LIMIT_REQUESTS_PER_MINUTE)
+app.add_middleware(RateLimitMiddleware)
+
+# Refuse oversized request bodies before they're read (MAX_UPLOAD_SIZE plus
+# the multipart envelope)
+app.add_middleware(ContentSizeLimitMiddleware)
+
+# Add trusted host middleware for production, outside the rate limiter so
+# requests with a bad Host header are refused before they spend tokens or
+# create per-client buckets
+if settings.is_production:
+    app.add_middleware(
+        TrustedHostMiddleware,
+        allowed_hosts=["*.onrender.com", "localhost", "127.0.0.1"]
     )
 
-# Add middleware
+# Add CORS last so it is the outermost middleware: preflights are answered
+# without touching the host check, rate limiter or routes, and 413/429
+# responses still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
@@ -156,16 +166,6 @@ async def redoc_html():
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"]
 )
 
-# Add trusted host middleware for production
-if settings.is_production:
-    app.add_middleware(
-        TrustedHostMiddleware,
-        allowed_hosts=["*.onrender.com", "localhost", "127.0.0.1"]
-    )
-
-# Add rate limiting middleware
-app.add_middleware(RateLimiterMiddleware, limit=100, window=3600)  # 100 requests per hour
-
 # Include the router with operation configuration
 app.include_router(
     routers.router,
@@ -177,17 +177,18 @@ def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
     
-    openapi_schema = app.openapi()
+    # Build with FastAPI's own implementation; app.openapi is this function
+    openapi_schema = FastAPI.openapi(app)
     
     # Add security scheme
-    openapi_schema["components"]["securitySchemes"] = {
+    openapi_schema.setdefault("components", {}).setdefault("securitySchemes", {}).update({
         "ApiKeyAuth": {
             "type": "apiKey",
             "in": "header",
             "name": "X-RapidAPI-Proxy-Secret",
             "description": "API key for authentication"
         }
-    }
+    })
     
     # Add security to all operations
     for path in openapi_schema["paths"].values():
@@ -201,12 +202,25 @@ def custom_openapi():
 app.openapi = custom_openapi
 
 
+@lru_cache(maxsize=1)
+def openapi_json_bytes() -> bytes:
+    """Serialize the OpenAPI schema once; /openapi.json serves these bytes."""
+    return orjson.dumps(app.openapi())
+
+
+# The schema is not published in production
+if not settings.is_production:
+    @app.get("/openapi.json", include_in_schema=False)
+    async def openapi_json():
+        return Response(content=openapi_json_bytes(), media_type="application/json")
+
+
 # Enhanced exception handlers
 @app.exception_handler(ValueError)
 async def value_error_handler(request: Request, exc: ValueError):
     """Handle value errors with appropriate error messages."""
-    logger.warning(f"Value error on {request.url}: {exc}")
-    return JSONResponse(
+    logger.warning("Value error on %s: %s", request.scope.get("path", "?"), exc)
+    return ORJSONResponse(
         status_code=400,
         content={"error": "Bad Request", "detail": str(exc)},
     )
@@ -215,11 +229,11 @@ async def value_error_handler(request: Request, exc: ValueError):
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
     """Handle any unexpected server errors for a clean response."""
-    logger.error(f"Unexpected error on {request.url}: {exc}", exc_info=True)
+    logger.error("Unexpected error on %s: %s", request.scope.get("path", "?"), exc, exc_info=True)
     
     error_detail = str(exc) if settings.debug else "An unexpected server error occurred"
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal Server Error", "detail": error_detail},
     )
@@ -227,7 +241,7 @@ async def generic_exception_handler(request: Request, exc: Exception):
 
 # Root Endpoint (Health Check)
 @app.get("/", tags=["Health Check"])
-async def root():
+async def root(settings: Settings = Depends(get_settings)):
     """
     Health check endpoint to confirm the API is running.
     
@@ -243,7 +257,7 @@ async def root():
 
 
 @app.get("/health", tags=["Health Check"])
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """
     Detailed health check endpoint.
     
@@ -1,118 +1,254 @@
 """
-Rate limiting middleware for Dev API Vault.
-Implements IP-based rate limiting to prevent abuse.
+Rate limiting and request size middleware for Dev API Vault.
+Implements IP-based rate limiting and body size limits to prevent abuse.
 """
 
+import math
 import time
-from collections import defaultdict, deque
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Paths that are never rate limited (health checks, root endpoint and docs)
+_SKIP_PATHS = frozenset({"/", "/health", "/docs", "/redoc", "/openapi.json"})
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+# Pre-encoded 429 response, sent without building a Response object
+_RATE_LIMITED_BODY = b'{"detail":"Rate limit exceeded. Please try again later."}'
+_RATE_LIMITED_HEADERS = (
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_RATE_LIMITED_BODY)).encode("latin-1")),
+)
+
+# Pre-encoded 413 response for bodies whose Content-Length is over the limit
+_TOO_LARGE_DETAIL = "Request body too large."
+_TOO_LARGE_BODY = b'{"detail":"Request body too large."}'
+_TOO_LARGE_HEADERS = (
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_TOO_LARGE_BODY)).encode("latin-1")),
+)
+_CONTENT_LENGTH = b"content-length"
+
+# Allowance on top of MAX_UPLOAD_SIZE for the multipart boundaries and part
+# headers around an upload, so a file of exactly the limit is accepted and
+# the endpoint's own per-file check decides
+_MULTIPART_HEADROOM = 64 * 1024
+
+# Proxy headers consulted for the client IP, as raw ASGI header names
+_X_FORWARDED_FOR = b"x-forwarded-for"
+_X_FORWARDED = b"x-forwarded"
+_X_REAL_IP = b"x-real-ip"
+
+
+class RateLimitMiddleware:
     """
-    Rate limiting middleware using sliding window approach.
+    Rate limiting middleware using a token bucket per IP address.
     
-    Tracks requests per IP address and enforces rate limits.
+    Each IP may burst up to ``requests_per_minute`` requests, refilled at
+    ``requests_per_minute / 60`` tokens per second; the same shape as the
+    GCRA limit applied through Redis. Implemented as
+    a plain ASGI middleware so requests are not bridged through
+    BaseHTTPMiddleware's task group and body stream.
     """
     
-    def __init__(self, app, requests_per_minute: int = None):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, requests_per_minute: int = None, max_tracked_ips: int = 100_000):
+        self.app = app
         self.requests_per_minute = requests_per_minute or settings.rate_limit_requests_per_minute
-        self.request_history = defaultdict(deque)
-        self.cleanup_interval = 300  # Clean up old entries every 5 minutes
-        self.last_cleanup = time.time()
+        self._limit_header = (b"x-ratelimit-limit", str(self.requests_per_minute).encode())
+        self._refill_rate = self.requests_per_minute / 60
+        # LRU of per-IP [tokens, last refill time], capped so an IP flood
+        # can't grow it without bound
+        self.buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.max_tracked_ips = max_tracked_ips
+        # Bucket bookkeeping uses the monotonic clock so NTP steps can't
+        # corrupt it; this offset converts to Unix time for X-RateLimit-Reset.
+        self._wall_clock_offset = time.time() - time.monotonic()
     
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request with rate limiting."""
         
-        # Skip rate limiting for health checks and root endpoint
-        if request.url.path in ["/", "/health", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
+        # Skip rate limiting for non-HTTP traffic, health checks and root endpoint
+        if scope["type"] != "http" or scope["path"] in _SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
         
-        client_ip = self._get_client_ip(request)
-        current_time = time.time()
+        client_ip = self._get_client_ip(scope)
+        current_time = time.monotonic()
         
-        # Clean up old entries periodically
-        if current_time - self.last_cleanup > self.cleanup_interval:
-            self._cleanup_old_entries(current_time)
-            self.last_cleanup = current_time
+        # Prefer the shared Redis counter, fall back to the in-process bucket
+        redis = getattr(scope["app"].state, "redis", None) if "app" in scope else None
+        result = None
+        if redis is not None:
+            result = await self._throttle_redis(redis, client_ip)
+        if result is None:
+            result = self._throttle_local(client_ip, current_time)
+        limited, remaining, retry_after, reset_after = result
         
         # Check rate limit
-        if self._is_rate_limited(client_ip, current_time):
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later.",
-                headers={"Retry-After": "60"}
+        if limited:
+            logger.warning("Rate limit exceeded for IP: %s", client_ip)
+            await self._send_rate_limited(send, retry_after)
+            return
+        
+        async def send_with_rate_limit_headers(message: Message):
+            # Add rate limit headers as raw tuples; MutableHeaders would
+            # rescan the header list on every append
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    self._limit_header,
+                    (b"x-ratelimit-remaining", str(remaining).encode()),
+                    (b"x-ratelimit-reset", str(int(current_time + self._wall_clock_offset + reset_after)).encode()),
+                ]
+            await send(message)
+        
+        await self.app(scope, receive, send_with_rate_limit_headers)
+    
+    async def _send_rate_limited(self, send: Send, retry_after: int):
+        """Send the 429 response straight to the client from pre-encoded parts."""
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_429_TOO_MANY_REQUESTS,
+            "headers": [
+                *_RATE_LIMITED_HEADERS,
+                (b"retry-after", str(retry_after).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+    
+    async def _throttle_redis(self, redis, client_ip: str) -> Optional[Tuple[bool, int, int, int]]:
+        """
+        Apply the limit with redis-cell's CL.THROTTLE (GCRA).
+        
+        Returns None when Redis is unreachable so the caller can fall back
+        to the in-process bucket.
+        """
+        try:
+            limited, _, remaining, retry_after, reset_after = await redis.execute_command(
+                "CL.THROTTLE",
+                f"rl:{client_ip}",
+                self.requests_per_minute - 1,  # max burst; CL.THROTTLE allows burst + 1
+                self.requests_per_minute,
+                60,
             )
-        
-        # Record this request
-        self.request_history[client_ip].append(current_time)
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        remaining = max(0, self.requests_per_minute - len(self.request_history[client_ip]))
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + 60))
-        
-        return response
+        except Exception as e:
+            logger.error("Redis rate limiting failed, using local limiter: %s", e)
+            return None
+        return bool(limited), int(remaining), max(int(retry_after), 0), int(reset_after)
     
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract client IP address from request."""
-        # Check for forwarded headers (common in production behind proxies)
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # Take the first IP in the chain
-            return forwarded_for.split(",")[0].strip()
-        
-        forwarded = request.headers.get("X-Forwarded")
-        if forwarded:
-            return forwarded.split(",")[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
+    def _throttle_local(self, client_ip: str, current_time: float) -> Tuple[bool, int, int, int]:
+        """Apply the limit with the per-process token bucket."""
+        bucket = self._get_bucket(client_ip, current_time)
+        
+        # Refill for the time since the last request, up to a full bucket
+        tokens = min(
+            self.requests_per_minute,
+            bucket[0] + (current_time - bucket[1]) * self._refill_rate,
+        )
+        bucket[1] = current_time
+        
+        limited = tokens < 1
+        if not limited:
+            tokens -= 1
+        bucket[0] = tokens
+        
+        retry_after = math.ceil((1 - tokens) / self._refill_rate) if limited else 0
+        reset_after = math.ceil((self.requests_per_minute - tokens) / self._refill_rate)
+        return limited, int(tokens), retry_after, reset_after
+    
+    def _get_bucket(self, client_ip: str, current_time: float) -> List[float]:
+        """Return the bucket for an IP, evicting the least recently seen IP when full."""
+        bucket = self.buckets.get(client_ip)
+        if bucket is None:
+            # New IPs start with a full bucket
+            bucket = self.buckets[client_ip] = [float(self.requests_per_minute), current_time]
+            if len(self.buckets) > self.max_tracked_ips:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(client_ip)
+        return bucket
+    
+    def _get_client_ip(self, scope: Scope) -> str:
+        """Extract client IP address from the ASGI scope."""
+        # Check for forwarded headers (common in production behind proxies).
+        # ASGI header names are already lowercase bytes, so compare them
+        # directly in one pass instead of building a Headers object.
+        forwarded_for = forwarded = real_ip = None
+        for name, value in scope["headers"]:
+            if name == _X_FORWARDED_FOR:
+                forwarded_for = value
+                break
+            if name == _X_FORWARDED and forwarded is None:
+                forwarded = value
+            elif name == _X_REAL_IP and real_ip is None:
+                real_ip = value
+        
+        # Take the first IP in the chain
+        chain = forwarded_for or forwarded
+        if chain:
+            first, _, _ = chain.partition(b",")
+            return first.strip().decode("latin-1") or "unknown"
+        
         if real_ip:
-            return real_ip
+            return real_ip.decode("latin-1")
         
         # Fall back to direct client IP
-        return request.client.host if request.client else "unknown"
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+class ContentSizeLimitMiddleware:
+    """
+    Reject request bodies larger than ``max_content_size`` bytes with a 413.
     
-    def _is_rate_limited(self, client_ip: str, current_time: float) -> bool:
-        """Check if client IP has exceeded rate limit."""
-        requests = self.request_history[client_ip]
-        
-        # Remove requests older than 1 minute
-        while requests and current_time - requests[0] > 60:
-            requests.popleft()
-        
-        # Check if rate limit exceeded
-        return len(requests) >= self.requests_per_minute
+    The default is MAX_UPLOAD_SIZE plus room for the multipart envelope.
+    A declared Content-Length over the limit is refused before any of the
+    body is read. Bodies without one (chunked uploads) are counted as they
+    stream in and cut off as soon as they pass the limit, so an oversized
+    upload is never buffered in full.
+    """
+    
+    def __init__(self, app: ASGIApp, max_content_size: int = None):
+        self.app = app
+        self.max_content_size = max_content_size or settings.max_upload_size + _MULTIPART_HEADROOM
     
-    def _cleanup_old_entries(self, current_time: float):
-        """Clean up old request history entries."""
-        ips_to_remove = []
-        
-        for client_ip, requests in self.request_history.items():
-            # Remove old requests
-            while requests and current_time - requests[0] > 300:  # 5 minutes
-                requests.popleft()
-            
-            # If no recent requests, mark IP for removal
-            if not requests:
-                ips_to_remove.append(client_ip)
-        
-        # Remove empty entries
-        for ip in ips_to_remove:
-            del self.request_history[ip]
-        
-        if ips_to_remove:
-            logger.debug(f"Cleaned up rate limit history for {len(ips_to_remove)} IPs")
\ No newline at end of file
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Process request with a body size limit."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope["headers"]:
+            if name == _CONTENT_LENGTH:
+                if value.isdigit() and int(value) > self.max_content_size:
+                    await send({
+                        "type": "http.response.start",
+                        "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        "headers": list(_TOO_LARGE_HEADERS),
+                    })
+                    await send({"type": "http.response.body", "body": _TOO_LARGE_BODY})
+                    return
+                break
+        
+        received = 0
+        
+        async def receive_with_limit() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_content_size:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so
+                    # this becomes a regular 413 response
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=_TOO_LARGE_DETAIL
+                    )
+            return message
+        
+        await self.app(scope, receive_with_limit, send)
@@ -3,31 +3,195 @@
 Defines request and response schemas for all API endpoints.
 """
 
-from pydantic import BaseModel, Field, HttpUrl, validator
-from typing import List, Optional, Union
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints, field_validator
+from typing import Annotated, List, Optional
 import re
 
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # Python < 3.11
+    import sre_parse
+
+try:
+    import re2
+except ImportError:
+    # Fall back to the backtracking re engine for every pattern
+    re2 = None
+
+__all__ = [
+    "MarkdownRequest",
+    "HtmlResponse",
+    "QrCodeRequest",
+    "QrCodeResponse",
+    "Base64Response",
+    "RegexRequest",
+    "RegexResponse",
+    "UrlRequest",
+    "WordCountResponse",
+    "TextSummarizeRequest",
+    "SummaryResponse",
+    "ErrorResponse",
+    "HealthResponse",
+]
+
+# Requests and responses are never mutated after validation; freezing them
+# lets pydantic skip validate-on-assignment hooks.
+FROZEN = ConfigDict(frozen=True)
+
+# Free-text inputs are stripped and length-checked inside pydantic-core,
+# so blank input fails min_length without a Python validator.
+MarkdownText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=10000)]
+SummaryText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=50, max_length=100000)]
+
+
+@lru_cache(maxsize=1024)
+def _compile(pattern: str) -> re.Pattern:
+    """Compile a regex pattern, reusing the result for repeated patterns."""
+    return re.compile(pattern)
+
+
+if re2 is not None:
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+
+
+# re's view of the ASCII category escapes. RE2's own \s omits \v and
+# \x1c-\x1f, so categories are always spelled out for it.
+_ASCII_CATEGORIES = {
+    sre_parse.CATEGORY_DIGIT: r"0-9",
+    sre_parse.CATEGORY_WORD: r"0-9A-Za-z_",
+    sre_parse.CATEGORY_SPACE: r"\t\n\x0b\x0c\r\x1c-\x1f ",
+}
+_NEGATED_CATEGORIES = {
+    sre_parse.CATEGORY_NOT_DIGIT: sre_parse.CATEGORY_DIGIT,
+    sre_parse.CATEGORY_NOT_WORD: sre_parse.CATEGORY_WORD,
+    sre_parse.CATEGORY_NOT_SPACE: sre_parse.CATEGORY_SPACE,
+}
+_ANCHORS = {
+    sre_parse.AT_BEGINNING: "^",
+    sre_parse.AT_BEGINNING_STRING: r"\A",
+    sre_parse.AT_BOUNDARY: r"\b",
+    sre_parse.AT_NON_BOUNDARY: r"\B",
+}
+
+
+def _re2_char(code: int) -> str:
+    """Escape a single code point for RE2."""
+    return "\\x{%x}" % code
+
+
+def _re2_set(items) -> Optional[str]:
+    """Spell out an IN node as an RE2 character class, or None."""
+    negate = ""
+    parts = []
+    for op, av in items:
+        if op is sre_parse.NEGATE:
+            negate = "^"
+        elif op is sre_parse.LITERAL:
+            parts.append(_re2_char(av))
+        elif op is sre_parse.RANGE:
+            parts.append(_re2_char(av[0]) + "-" + _re2_char(av[1]))
+        elif op is sre_parse.CATEGORY and av in _ASCII_CATEGORIES:
+            parts.append(_ASCII_CATEGORIES[av])
+        elif op is sre_parse.CATEGORY and av in _NEGATED_CATEGORIES and len(items) == 1:
+            # A lone \D, \W or \S; negated categories can't be mixed into a class
+            return "[^" + _ASCII_CATEGORIES[_NEGATED_CATEGORIES[av]] + "]"
+        else:
+            return None
+    return "[" + negate + "".join(parts) + "]"
+
+
+def _re2_pattern(tree) -> Optional[str]:
+    """
+    Rebuild re's parse tree in unambiguous RE2 syntax, or return None.
+    
+    Only a subset whose meaning both engines agree on is emitted, and every
+    character is escaped, so source syntax the engines read differently
+    (POSIX ``[[:alpha:]]`` classes, ``{,n}``, \s) never reaches RE2 as text.
+    """
+    out = []
+    for op, av in tree:
+        if op is sre_parse.LITERAL:
+            out.append(_re2_char(av))
+        elif op is sre_parse.NOT_LITERAL:
+            out.append("[^" + _re2_char(av) + "]")
+        elif op is sre_parse.ANY:
+            out.append(".")
+        elif op is sre_parse.IN:
+            part = _re2_set(av)
+            if part is None:
+                return None
+            out.append(part)
+        elif op is sre_parse.AT and av in _ANCHORS:
+            out.append(_ANCHORS[av])
+        elif op is sre_parse.BRANCH:
+            branches = [_re2_pattern(branch) for branch in av[1]]
+            if None in branches:
+                return None
+            out.append("(?:" + "|".join(branches) + ")")
+        elif op is sre_parse.SUBPATTERN:
+            group, add_flags, del_flags, sub = av
+            inner = _re2_pattern(sub)
+            if inner is None or add_flags or del_flags:
+                return None
+            out.append(("(" if group else "(?:") + inner + ")")
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            low, high, sub = av
+            inner = _re2_pattern(sub)
+            if inner is None:
+                return None
+            high = "" if high is sre_parse.MAXREPEAT else str(high)
+            lazy = "?" if op is sre_parse.MIN_REPEAT else ""
+            out.append("(?:" + inner + "){%d,%s}" % (low, high) + lazy)
+        else:
+            # $ (matches before a trailing newline in re), lookaround,
+            # backreferences, possessive repeats, ...
+            return None
+    return "".join(out)
+
+
+@lru_cache(maxsize=1024)
+def _compile_linear(pattern: str):
+    """Compile a pattern with RE2, or return None if unavailable or unsupported."""
+    if re2 is None:
+        return None
+    tree = sre_parse.parse(pattern)
+    # RE2's findall() treats empty matches differently from re's (e.g. it
+    # returns two matches for '$' on 'abc'), so only patterns that can never
+    # match the empty string go to RE2
+    if tree.getwidth()[0] == 0:
+        return None
+    # Inline flags like (?i) or (?s) change meaning between the engines
+    if tree.state.flags & ~re.UNICODE:
+        return None
+    translated = _re2_pattern(tree)
+    if translated is None:
+        return None
+    try:
+        return re2.compile(translated, _RE2_OPTIONS)
+    except re2.error:
+        # e.g. repeat counts above RE2's limit of 1000
+        return None
+
 
 # 1. Markdown to HTML
 class MarkdownRequest(BaseModel):
     """Request model for markdown to HTML conversion."""
-    markdown_text: str = Field(
+    model_config = FROZEN
+    
+    markdown_text: MarkdownText = Field(
         ..., 
         example="# Hello World\n\nThis is **bold** text.", 
-        description="The Markdown text to convert.",
-        min_length=1,
-        max_length=10000
+        description="The Markdown text to convert."
     )
-    
-    @validator('markdown_text')
-    def validate_markdown_text(cls, v):
-        if not v.strip():
-            raise ValueError("Markdown text cannot be empty or only whitespace")
-        return v
 
 
 class HtmlResponse(BaseModel):
     """Response model for markdown to HTML conversion."""
+    model_config = FROZEN
+    
     html_content: str = Field(
         ..., 
         example="<h1>Hello World</h1>\n<p>This is <strong>bold</strong> text.</p>", 
@@ -38,6 +202,8 @@ class HtmlResponse(BaseModel):
 # 2. QR Code Generator
 class QrCodeRequest(BaseModel):
     """Request model for QR code generation."""
+    model_config = FROZEN
+    
     data: str = Field(
         ..., 
         example="https://fastapi.tiangolo.com/", 
@@ -60,6 +226,8 @@ class QrCodeRequest(BaseModel):
 
 class QrCodeResponse(BaseModel):
     """Response model for QR code generation."""
+    model_config = FROZEN
+    
     qr_code_base64: str = Field(
         ..., 
         description="Base64 encoded PNG image of the QR code, ready for use in an <img> tag."
@@ -69,6 +237,8 @@ class QrCodeResponse(BaseModel):
 # 3. Image to Base64
 class Base64Response(BaseModel):
     """Response model for image to base64 conversion."""
+    model_config = FROZEN
+    
     filename: Optional[str] = Field(None, description="Original filename of the uploaded image")
     base64_string: str = Field(..., description="Base64 encoded image data")
     file_size: Optional[int] = Field(None, description="Size of the original file in bytes")
@@ -78,6 +248,8 @@ class Base64Response(BaseModel):
 # 4. Regex Tester
 class RegexRequest(BaseModel):
     """Request model for regex testing."""
+    model_config = FROZEN
+    
     pattern: str = Field(
         ..., 
         example=r"\d+", 
@@ -91,33 +263,72 @@ class RegexRequest(BaseModel):
         max_length=50000
     )
     
-    @validator('pattern')
+    @field_validator('pattern')
+    @classmethod
     def validate_pattern(cls, v):
         try:
-            re.compile(v)
+            _compile(v)
         except re.error as e:
             raise ValueError(f"Invalid regex pattern: {e}")
         return v
+    
+    def compiled(self) -> re.Pattern:
+        """Return the compiled pattern (cached by the validator)."""
+        return _compile(self.pattern)
+    
+    def matcher(self, text: str):
+        """
+        Return the compiled pattern to search ``text`` with.
+        
+        RE2 matches in linear time, so it is preferred when installed. Its
+        \\w, \\d and \\b classes are ASCII-only, so it is only used on ASCII
+        text, and only for patterns that can't match the empty string and that
+        _re2_pattern can restate exactly, where its findall() results agree
+        with re's.
+        """
+        if text.isascii():
+            linear = _compile_linear(self.pattern)
+            if linear is not None:
+                return linear
+        return self.compiled()
 
 
 class RegexResponse(BaseModel):
     """Response model for regex testing."""
-    matches: List[str] = Field(..., description="List of matches found")
+    model_config = FROZEN
+    
+    matches: List[str] = Field(
+        ..., 
+        description="List of matches found: the group's text for single-group patterns, otherwise the whole match"
+    )
     match_count: int = Field(..., description="Total number of matches found")
 
 
 # 5. Webpage Word Counter
 class UrlRequest(BaseModel):
     """Request model for URL-based operations."""
-    url: HttpUrl = Field(
+    model_config = FROZEN
+    
+    url: str = Field(
         ..., 
         example="https://example.com", 
-        description="The URL of the webpage to analyze."
+        description="The URL of the webpage to analyze.",
+        max_length=2048
     )
+    
+    @field_validator('url')
+    @classmethod
+    def validate_url(cls, v):
+        # A cheap scheme check; host safety is checked before fetching
+        if not v[:8].lower().startswith(("http://", "https://")):
+            raise ValueError("URL must start with http:// or https://")
+        return v
 
 
 class WordCountResponse(BaseModel):
     """Response model for webpage word counting."""
+    model_config = FROZEN
+    
     url: str = Field(..., description="The analyzed URL")
     word_count: int = Field(..., description="Number of words found")
     char_count: int = Field(..., description="Number of characters found")
@@ -128,10 +339,10 @@ class WordCountResponse(BaseModel):
 # 6. Rule-based Text Summarizer
 class TextSummarizeRequest(BaseModel):
     """Request model for text summarization."""
-    text: str = Field(
+    model_config = FROZEN
+    
+    text: SummaryText = Field(
         ..., 
-        min_length=50, 
-        max_length=100000,
         description="Text to be summarized (minimum 50 characters)."
     )
     sentence_count: int = Field(
@@ -141,19 +352,20 @@ class TextSummarizeRequest(BaseModel):
         description="Number of sentences in the final summary (1-20)."
     )
     
-    @validator('text')
+    @field_validator('text')
+    @classmethod
     def validate_text(cls, v):
-        if not v.strip():
-            raise ValueError("Text cannot be empty or only whitespace")
-        # Basic check for meaningful content
-        words = v.split()
-        if len(words) < 10:
+        # Basic check for meaningful content; maxsplit stops after the
+        # 10th word instead of building a list of every word
+        if len(v.split(None, 9)) < 10:
             raise ValueError("Text must contain at least 10 words for meaningful summarization")
         return v
 
 
 class SummaryResponse(BaseModel):
     """Response model for text summarization."""
+    model_config = FROZEN
+    
     original_sentence_count: int = Field(..., description="Number of sentences in original text")
     summary: str = Field(..., description="Summarized text")
     summary_sentence_count: int = Field(..., description="Number of sentences in summary")
@@ -162,6 +374,8 @@ class SummaryResponse(BaseModel):
 # Additional utility models
 class ErrorResponse(BaseModel):
     """Standard error response model."""
+    model_config = FROZEN
+    
     error: str = Field(..., description="Error type")
     detail: str = Field(..., description="Detailed error message")
     status_code: int = Field(..., description="HTTP status code")
@@ -169,6 +383,8 @@ class ErrorResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     """Health check response model."""
+    model_config = FROZEN
+    
     status: str = Field(..., description="Health status")
     version: str = Field(..., description="API version")
     environment: str = Field(..., description="Environment name")
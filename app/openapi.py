@@ -3,6 +3,7 @@
 This module provides additional OpenAPI documentation and schemas.
 """
 
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 from enum import Enum
@@ -29,31 +30,43 @@ class Tags(str, Enum):
     AUTH = "Authentication"
     STATUS = "Status"
 
-# Rate limit responses
-RATE_LIMIT_RESPONSES = {
-    429: {
-        "description": "Rate limit exceeded",
-        "model": ErrorResponse,
-        "headers": {
-            "Retry-After": {
-                "description": "Number of seconds to wait before making a new request",
-                "schema": {"type": "integer"}
-            },
-            **RateLimitHeaders.schema()
+_TAG_NAMES = tuple(tag.value for tag in Tags)
+
+# Response maps are built on first use (route registration), not at import,
+# so importing this module doesn't pay for any schema generation.
+@lru_cache(maxsize=1)
+def rate_limit_responses() -> Dict[int, Dict[str, Any]]:
+    """Get the 429 response documentation."""
+    return {
+        429: {
+            "description": "Rate limit exceeded",
+            "model": ErrorResponse,
+            "headers": {
+                "Retry-After": {
+                    "description": "Number of seconds to wait before making a new request",
+                    "schema": {"type": "integer"}
+                },
+                **{
+                    field.alias: {"description": field.description, "schema": {"type": "integer"}}
+                    for field in RateLimitHeaders.model_fields.values()
+                }
+            }
         }
     }
-}
 
-# Common error responses
-ERROR_RESPONSES = {
-    400: {"model": ErrorResponse, "description": "Bad Request"},
-    401: {"model": ErrorResponse, "description": "Unauthorized"},
-    403: {"model": ErrorResponse, "description": "Forbidden"},
-    404: {"model": ErrorResponse, "description": "Not Found"},
-    422: {"model": ErrorResponse, "description": "Validation Error"},
-    500: {"model": ErrorResponse, "description": "Internal Server Error"},
-    **RATE_LIMIT_RESPONSES
-}
+@lru_cache(maxsize=1)
+def error_responses() -> Dict[int, Dict[str, Any]]:
+    """Get the common error response documentation."""
+    return {
+        400: {"model": ErrorResponse, "description": "Bad Request"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"},
+        403: {"model": ErrorResponse, "description": "Forbidden"},
+        404: {"model": ErrorResponse, "description": "Not Found"},
+        413: {"model": ErrorResponse, "description": "Payload Too Large"},
+        422: {"model": ErrorResponse, "description": "Validation Error"},
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+        **rate_limit_responses()
+    }
 
 # API Metadata
 API_METADATA = {
@@ -86,7 +99,6 @@ class Tags(str, Enum):
     - [Report an Issue](https://github.com/KrunalValvi/Dev_Api_Vault/issues)
     - [Request a Feature](https://github.com/KrunalValvi/Dev_Api_Vault/issues/new?template=feature_request.md)
     """,
-    "version": "1.0.0",
     "contact": {
         "name": "API Support",
         "url": "https://github.com/KrunalValvi/Dev_Api_Vault/issues",
@@ -113,6 +125,7 @@ class Tags(str, Enum):
     ]
 }
 
+@lru_cache(maxsize=1)
 def get_openapi_tags() -> List[Dict[str, str]]:
     """Get the list of tags for the OpenAPI documentation."""
     return [
@@ -123,20 +136,26 @@ def get_openapi_tags() -> List[Dict[str, str]]:
         {"name": Tags.STATUS, "description": "Health and status checks"},
     ]
 
+@lru_cache(maxsize=1)
 def get_operation_config() -> Dict[str, Any]:
     """Get common operation configuration."""
     return {
-        "responses": ERROR_RESPONSES,
-        "tags": [tag["name"] for tag in get_openapi_tags()]
+        "responses": error_responses(),
+        "tags": list(_TAG_NAMES)
     }
 
+@lru_cache(maxsize=1)
 def get_secure_operation_config() -> Dict[str, Any]:
-    """Get operation configuration for endpoints requiring authentication."""
+    """
+    Get operation configuration for endpoints requiring authentication.
+    
+    The ApiKeyAuth security requirement itself is attached to operations
+    in main.custom_openapi; include_router has no ``security`` parameter.
+    """
     return {
         **get_operation_config(),
-        "security": [{"ApiKeyAuth": []}],
         "responses": {
-            **ERROR_RESPONSES,
+            **error_responses(),
             401: {"description": "Missing or invalid API key"},
             403: {"description": "Insufficient permissions"}
         }
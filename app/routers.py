@@ -4,22 +4,50 @@
 """
 
 # Standard Library Imports
-import base64
+import asyncio
+import hashlib
 import io
 import re
 import logging
-from collections import defaultdict
-import heapq
-from typing import List, Dict, Any
+import threading
+from functools import lru_cache, partial
+from itertools import chain
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO
 
 # Third-party Imports
-import markdown
-import qrcode
+import mistune
+import orjson
+from cachetools import LRUCache, TTLCache, cached
+import numpy as np
 import requests
+import segno
 from bs4 import BeautifulSoup
-from fastapi import APIRouter, HTTPException, File, UploadFile, Depends
+from requests.adapters import HTTPAdapter
+from fastapi import APIRouter, HTTPException, File, UploadFile, Depends, Request
+from fastapi.routing import APIRoute
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from nltk.corpus import stopwords
-from nltk.tokenize import sent_tokenize, word_tokenize
+from nltk.tokenize import sent_tokenize
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    # Fall back to BeautifulSoup
+    LexborHTMLParser = None
+
+try:
+    from pybase64 import b64encode
+except ImportError:
+    # The stdlib encoder is C too, just without SIMD
+    from base64 import b64encode
+
+try:
+    import lxml  # noqa: F401
+    _SOUP_PARSER = 'lxml'
+except ImportError:
+    # BeautifulSoup's pure-Python parser
+    _SOUP_PARSER = 'html.parser'
 
 # Local Imports
 from . import models
@@ -36,13 +64,77 @@
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Elements whose text doesn't count towards a page's words
+_NON_CONTENT_TAGS = ["script", "style", "nav", "footer", "header"]
+
+# Shared Markdown renderer; raw HTML in the input is escaped, not passed through
+_MARKDOWN = mistune.create_markdown(escape=True, plugins=['table', 'strikethrough'])
+
+# Upload read size for base64 encoding; a multiple of 3 so the encoded
+# chunks concatenate without padding in between
+_BASE64_CHUNK_SIZE = 3 * 64 * 1024
+
+# Alphanumeric word runs. Close to the isalnum() word_tokenize tokens the
+# summarizer used to score, but contractions and decimals split apart
+# ("don't" -> "don", "t"; "3.14" -> "3", "14") instead of being dropped
+_WORD_RE = re.compile(r"[^\W_]+")
+
+class ORJSONRequest(Request):
+    """Request whose JSON body is decoded with orjson instead of json."""
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError, so
+            # FastAPI still turns malformed bodies into a 422
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    """Route that hands its handler an ORJSONRequest."""
+    
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+        
+        async def route_handler(request: Request):
+            return await original_route_handler(ORJSONRequest(request.scope, request.receive))
+        
+        return route_handler
+
+
 # Initialize Router
 router = APIRouter(
     prefix="/api/v1",
     tags=["Utilities"],
-    dependencies=[Depends(security.verify_rapidapi_secret)]
+    dependencies=[Depends(security.verify_rapidapi_secret)],
+    default_response_class=ORJSONResponse,
+    route_class=ORJSONRoute
 )
 
+# Shared session so repeated fetches reuse pooled keep-alive connections
+# instead of a new TCP/TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.headers['User-Agent'] = 'Dev-API-Vault/2.0 (https://github.com/KrunalValvi/Dev_Api_Vault)'
+_SESSION.mount('http://', HTTPAdapter(pool_connections=50, pool_maxsize=50))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=50, pool_maxsize=50))
+
+# Rendered QR data URIs, bounded by total characters rather than entry count:
+# sizes range from a few hundred bytes to ~40KB at box_size 50 and 2000 chars
+# of data. A value larger than the whole budget is returned but not cached.
+_QR_CODE_CACHE: "LRUCache[Any, str]" = LRUCache(maxsize=8 * 1024 * 1024, getsizeof=len)
+
+# Word counter results keyed by SHA-256 of the URL, reused for five minutes
+_WORD_COUNT_CACHE: "TTLCache[str, Dict[str, Any]]" = TTLCache(maxsize=1024, ttl=300)
+# One in-flight fetch per URL; concurrent callers share its result or error
+_WORD_COUNT_TASKS: "Dict[str, asyncio.Future[Dict[str, Any]]]" = {}
+
+# Largest page body /word-counter will download (10MB)
+_MAX_FETCH_BYTES = 10 * 1024 * 1024
+_FETCH_CHUNK_SIZE = 64 * 1024
+
+# Content types accepted by /image-to-base64
+_IMAGE_CONTENT_TYPES = frozenset({'image/png', 'image/jpeg', 'image/jpg', 'image/gif', 'image/webp'})
+
 # Utility functions
 def validate_text_length(text: str, max_length: int = 50000) -> None:
     """Validate text length to prevent memory issues."""
@@ -53,8 +145,57 @@ def validate_text_length(text: str, max_length: int = 50000) -> None:
         )
 
 
+def upload_too_large(max_bytes: int) -> HTTPException:
+    """Build the 413 raised for uploads over ``max_bytes``."""
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum {max_bytes // (1024 * 1024)}MB allowed."
+    )
+
+
+def encode_base64_stream(stream: BinaryIO, max_bytes: int) -> Tuple[str, int]:
+    """
+    Base64-encode a binary file chunk by chunk, enforcing the size limit as it reads.
+    
+    Returns the encoded string and the file size in bytes. Blocking, so
+    call it through encode_upload_base64.
+    """
+    encoded = io.BytesIO()
+    size = 0
+    carry = b""
+    while chunk := stream.read(_BASE64_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise upload_too_large(max_bytes)
+        # Keep a short read's tail for the next chunk so only the end is padded
+        chunk = carry + chunk
+        cut = len(chunk) - len(chunk) % 3
+        encoded.write(b64encode(chunk[:cut]))
+        carry = chunk[cut:]
+    encoded.write(b64encode(carry))
+    with encoded.getbuffer() as view:
+        return str(view, "ascii"), size
+
+
+async def encode_upload_base64(file: UploadFile, max_bytes: int) -> Tuple[str, int]:
+    """
+    Base64-encode an upload in the threadpool, enforcing the size limit.
+    
+    Returns the encoded string and the upload size in bytes.
+    """
+    # The multipart parser records the size, so most oversized files are
+    # refused before any of them is read back
+    if file.size is not None and file.size > max_bytes:
+        raise upload_too_large(max_bytes)
+    
+    # UploadFile.read() on an in-memory spool never yields, so encoding
+    # through it would block the event loop for the whole file; read and
+    # encode the underlying file in one worker thread hop instead
+    return await run_in_threadpool(encode_base64_stream, file.file, max_bytes)
+
+
 def safe_web_request(url: str, timeout: int = None) -> requests.Response:
-    """Make a safe web request with proper error handling."""
+    """Make a safe web request with proper error handling (blocking)."""
     timeout = timeout or settings.request_timeout
     
     # Validate URL safety
@@ -64,29 +205,38 @@ def safe_web_request(url: str, timeout: int = None) -> requests.Response:
             detail="URL not allowed for security reasons"
         )
     
-    headers = {
-        'User-Agent': 'Dev-API-Vault/2.0 (https://github.com/KrunalValvi/Dev_Api_Vault)'
-    }
-    
     try:
-        response = requests.get(
+        response = _SESSION.get(
             str(url), 
             timeout=timeout, 
-            headers=headers,
             allow_redirects=True,
             verify=True,
-            stream=False  # Don't stream to prevent large downloads
+            stream=True  # Read the body ourselves so its size can be capped
         )
         
-        # Check content length before processing
-        content_length = response.headers.get('content-length')
-        if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-            raise HTTPException(
-                status_code=400,
-                detail="Content too large to process"
-            )
+        with response:
+            # Check content length before downloading the body
+            content_length = response.headers.get('content-length')
+            if content_length and int(content_length) > _MAX_FETCH_BYTES:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Content too large to process"
+                )
+            
+            response.raise_for_status()
+            
+            # Content-Length can be missing or wrong; stop once the cap is hit
+            body = bytearray()
+            for chunk in response.iter_content(_FETCH_CHUNK_SIZE):
+                body += chunk
+                if len(body) > _MAX_FETCH_BYTES:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Content too large to process"
+                    )
+            # Hand the capped body to response.content/.text as requests would
+            response._content = bytes(body)
         
-        response.raise_for_status()
         return response
     except requests.exceptions.Timeout:
         raise HTTPException(
@@ -110,19 +260,215 @@ def safe_web_request(url: str, timeout: int = None) -> requests.Response:
         )
 
 
+def close_http_session() -> None:
+    """Close the shared session's pooled connections; it reconnects if used again."""
+    _SESSION.close()
+
+
+@cached(_QR_CODE_CACHE, lock=threading.Lock())
+def qr_code_data_uri(data: str, box_size: int, border: int) -> str:
+    """Render ``data`` as a PNG QR code data URI; repeated inputs reuse the result."""
+    # Regular (not Micro) QR at the lowest error correction level, like qrcode's ERROR_CORRECT_L
+    qr = segno.make(data, error='l', boost_error=False, micro=False)
+    buffered = io.BytesIO()
+    qr.save(buffered, kind='png', scale=box_size, border=border, dark='black', light='white')
+    # Encode straight from the buffer rather than a getvalue() copy
+    with buffered.getbuffer() as png:
+        return f"data:image/png;base64,{b64encode(png).decode('ascii')}"
+
+
+def extract_page_text(html: str) -> Tuple[str, Optional[str]]:
+    """Return the whitespace-normalized visible text and the title of a page."""
+    if LexborHTMLParser is not None:
+        tree = LexborHTMLParser(html)
+        for node in tree.css(", ".join(_NON_CONTENT_TAGS)):
+            node.decompose()
+        text = tree.root.text(separator=' ', strip=True) if tree.root is not None else ""
+        title = tree.css_first('title')
+        title_text = title.text() if title is not None else None
+    else:
+        soup = BeautifulSoup(html, _SOUP_PARSER)
+        for element in soup(_NON_CONTENT_TAGS):
+            element.decompose()
+        text = soup.get_text(separator=' ', strip=True)
+        title = soup.find('title')
+        title_text = title.get_text() if title is not None else None
+    
+    return ' '.join(text.split()), title_text
+
+
+@lru_cache(maxsize=1)
+def get_stop_words() -> frozenset:
+    """Load the English stopword list once per process (empty if it's missing)."""
+    try:
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        logger.warning("NLTK stopwords not available, using empty set")
+        return frozenset()
+
+
+def init_nlp_worker() -> None:
+    """
+    Process pool initializer: load NLTK data once per worker process.
+    
+    Missing tokenizer data must not break the pool, so LookupError is
+    left for summarize_sync to report per request.
+    """
+    get_stop_words()
+    try:
+        sent_tokenize("Warm up the tokenizer.")
+    except LookupError:
+        pass
+
+
+def rank_sentences(sentences: List[str], stop_words: frozenset, count: int) -> List[int]:
+    """
+    Pick the indices of the highest-scoring sentences, in document order.
+    
+    Words are scored by their frequency (normalized to the most frequent
+    non-stopword) and a sentence by the mean score of its scored words.
+    Returns an empty list if no sentence contains a scored word.
+    """
+    token_lists = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
+    tokens = list(chain.from_iterable(token_lists))
+    if not tokens:
+        return []
+    
+    # Frequencies over the vocabulary, with stopwords zeroed out
+    vocab, token_ids = np.unique(np.array(tokens), return_inverse=True)
+    frequencies = np.bincount(token_ids, minlength=len(vocab)).astype(np.float64)
+    frequencies[np.fromiter((word in stop_words for word in vocab.tolist()), dtype=bool, count=len(vocab))] = 0
+    max_freq = frequencies.max()
+    if max_freq == 0:
+        return []
+    token_scores = frequencies[token_ids] / max_freq
+    
+    # Per-sentence score sums and scored-word counts
+    sentence_ids = np.repeat(np.arange(len(sentences)), [len(t) for t in token_lists])
+    totals = np.bincount(sentence_ids, weights=token_scores, minlength=len(sentences))
+    counts = np.bincount(sentence_ids, weights=token_scores > 0, minlength=len(sentences))
+    
+    # Only sentences with at least one scored word are candidates
+    candidates = np.flatnonzero(counts)
+    if len(candidates) > count:
+        scores = totals[candidates] / counts[candidates]
+        # Stable sort so tied sentences keep the earliest, as heapq.nlargest did
+        candidates = np.sort(candidates[np.argsort(-scores, kind="stable")[:count]])
+    return candidates.tolist()
+
+
+def summarize_sync(text: str, sentence_count: int) -> Dict[str, Any]:
+    """
+    Extractive summary of ``text`` as a SummaryResponse dict.
+    
+    Runs in a worker process (or thread) off the event loop, so it takes
+    and returns only picklable values.
+    """
+    # Tokenize sentences
+    sentences = sent_tokenize(text)
+    original_sentence_count = len(sentences)
+
+    # Return original text if already short enough
+    if original_sentence_count <= sentence_count:
+        return {
+            "original_sentence_count": original_sentence_count, 
+            "summary": text.strip(),
+            "summary_sentence_count": original_sentence_count
+        }
+
+    summary_sentences_indices = rank_sentences(sentences, get_stop_words(), sentence_count)
+    
+    # Handle edge case where no valid words found
+    if not summary_sentences_indices:
+        summary = ' '.join(sentences[:sentence_count])
+        return {
+            "original_sentence_count": original_sentence_count,
+            "summary": summary,
+            "summary_sentence_count": min(sentence_count, original_sentence_count)
+        }
+
+    # Sentences keep their own punctuation, so join with a plain space
+    summary = ' '.join(map(sentences.__getitem__, summary_sentences_indices))
+    
+    logger.info(f"Summarized {original_sentence_count} sentences to {len(summary_sentences_indices)}")
+    
+    return {
+        "original_sentence_count": original_sentence_count,
+        "summary": summary,
+        "summary_sentence_count": len(summary_sentences_indices)
+    }
+
+
+async def count_words_at_url(url: str) -> Dict[str, Any]:
+    """Fetch a page and build the WordCountResponse dict for it."""
+    # requests is blocking; fetch in the threadpool to keep the loop free
+    response = await run_in_threadpool(safe_web_request, url)
+    
+    # Most pages are UTF-8; otherwise let requests pick the charset
+    try:
+        html = response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        html = response.text
+    clean_text, title_text = extract_page_text(html)
+    
+    # Text is already single-space separated, so words are spaces + 1
+    word_count = clean_text.count(' ') + 1 if clean_text else 0
+    char_count = len(clean_text)
+    title_text = title_text.strip() if title_text is not None else "No title found"
+    
+    logger.info(f"Word count completed for {url}: {word_count} words")
+    
+    return {
+        "url": str(url),
+        "word_count": word_count,
+        "char_count": char_count,
+        "title": title_text[:200],  # Limit title length
+        "status_code": response.status_code
+    }
+
+
+def _finish_word_count(key: str, task: "asyncio.Future[Dict[str, Any]]") -> None:
+    """Cache a finished fetch's result and drop it from the in-flight table."""
+    if _WORD_COUNT_TASKS.get(key) is task:
+        del _WORD_COUNT_TASKS[key]
+    # Failures aren't cached, so the next request after this one retries
+    if not task.cancelled() and task.exception() is None:
+        _WORD_COUNT_CACHE[key] = task.result()
+
+
+async def _count_words_shared(url: str, key: str) -> Dict[str, Any]:
+    """Run count_words_at_url once per URL however many callers are waiting."""
+    task = _WORD_COUNT_TASKS.get(key)
+    if task is None:
+        task = asyncio.ensure_future(count_words_at_url(url))
+        task.add_done_callback(partial(_finish_word_count, key))
+        _WORD_COUNT_TASKS[key] = task
+    # shield() so one caller disconnecting doesn't cancel the fetch for the rest
+    return await asyncio.shield(task)
+
+
 # --- API Endpoints ---
+# CPU-bound handlers (markdown, QR code, regex) are plain ``def`` so FastAPI
+# runs them in its threadpool; the rest are ``async def`` and hand their
+# blocking work (fetching, summarizing) to a thread or process pool.
+#
+# Response bodies are built from values this module produced, so endpoints
+# return ORJSONResponse directly and FastAPI skips re-validating them against
+# response_model, which is kept for the OpenAPI schema. Nothing checks the
+# payload against that schema at runtime, so each endpoint must build exactly
+# the shape its response_model declares.
 
 @router.post(
     "/markdown-to-html", 
     response_model=models.HtmlResponse, 
     summary="Convert Markdown to HTML"
 )
-async def convert_markdown_to_html(request: models.MarkdownRequest):
+def convert_markdown_to_html(request: models.MarkdownRequest):
     """
     Convert Markdown text to HTML format.
     
     This endpoint takes Markdown text and converts it to clean HTML using
-    the Python markdown library with safe defaults.
+    mistune with raw HTML escaped.
     
     Args:
         request: MarkdownRequest containing the markdown text
@@ -139,15 +485,11 @@ async def convert_markdown_to_html(request: models.MarkdownRequest):
         # Sanitize input
         sanitized_text = sanitize_user_input(request.markdown_text, 10000)
         
-        # Use safe markdown conversion with extensions
-        html_content = markdown.markdown(
-            sanitized_text,
-            extensions=['tables', 'fenced_code', 'toc'],
-            tab_length=4
-        )
+        # Use safe markdown conversion (tables, fenced code, escaped HTML)
+        html_content = _MARKDOWN(sanitized_text)
         
         logger.info(f"Successfully converted {len(request.markdown_text)} chars of markdown")
-        return {"html_content": html_content}
+        return ORJSONResponse({"html_content": html_content})
         
     except Exception as e:
         logger.error(f"Markdown conversion failed: {e}")
@@ -162,7 +504,7 @@ async def convert_markdown_to_html(request: models.MarkdownRequest):
     response_model=models.QrCodeResponse, 
     summary="Generate a QR Code"
 )
-async def generate_qr_code(request: models.QrCodeRequest):
+def generate_qr_code(request: models.QrCodeRequest):
     """
     Generate a QR code from the provided data.
     
@@ -181,23 +523,14 @@ async def generate_qr_code(request: models.QrCodeRequest):
     try:
         validate_text_length(str(request.data), 2000)
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=min(request.box_size, 50),  # Limit box size
-            border=min(request.border, 20),      # Limit border
+        qr_code = qr_code_data_uri(
+            str(request.data),
+            min(request.box_size, 50),  # Limit box size
+            min(request.border, 20),    # Limit border
         )
-        qr.add_data(str(request.data))
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
         
         logger.info(f"Generated QR code for {len(str(request.data))} chars of data")
-        return {"qr_code_base64": f"data:image/png;base64,{img_str}"}
+        return ORJSONResponse({"qr_code_base64": qr_code})
         
     except Exception as e:
         logger.error(f"QR code generation failed: {e}")
@@ -230,35 +563,25 @@ async def image_to_base64(file: UploadFile = File(...)):
     """
     try:
         # Validate file type
-        allowed_types = ['image/png', 'image/jpeg', 'image/jpg', 'image/gif', 'image/webp']
-        if not file.content_type or not check_content_type_safety(file.content_type, allowed_types):
+        if not file.content_type or not check_content_type_safety(file.content_type, _IMAGE_CONTENT_TYPES):
             raise HTTPException(
                 status_code=400,
                 detail="File must be a supported image format (PNG, JPEG, GIF, WebP)"
             )
         
-        # Read file content
-        contents = await file.read()
-        
-        # Validate file size (10MB limit)
-        if len(contents) > 10 * 1024 * 1024:
-            raise HTTPException(
-                status_code=400,
-                detail="File too large. Maximum 10MB allowed."
-            )
-        
-        base64_encoded_str = base64.b64encode(contents).decode("utf-8")
+        # Encode while reading, rejecting oversized files mid-stream
+        base64_encoded_str, file_size = await encode_upload_base64(file, settings.max_upload_size)
         
         # Sanitize filename
         safe_filename = sanitize_filename(file.filename) if file.filename else "unknown"
         
-        logger.info(f"Converted image {safe_filename} ({len(contents)} bytes) to base64")
-        return {
+        logger.info(f"Converted image {safe_filename} ({file_size} bytes) to base64")
+        return ORJSONResponse({
             "filename": safe_filename, 
             "base64_string": base64_encoded_str,
-            "file_size": len(contents),
+            "file_size": file_size,
             "content_type": file.content_type
-        }
+        })
         
     except HTTPException:
         raise
@@ -275,7 +598,7 @@ async def image_to_base64(file: UploadFile = File(...)):
     response_model=models.RegexResponse, 
     summary="Test a Regular Expression"
 )
-async def test_regex(request: models.RegexRequest):
+def test_regex(request: models.RegexRequest):
     """
     Test a regular expression pattern against text.
     
@@ -305,9 +628,15 @@ async def test_regex(request: models.RegexRequest):
         # Sanitize input text
         sanitized_text = sanitize_user_input(request.text, 50000)
         
-        # Compile pattern first to validate it
-        compiled_pattern = re.compile(request.pattern)
-        matches = compiled_pattern.findall(sanitized_text)
+        # Pattern was compiled (and cached) when the request was validated;
+        # RE2 is used instead where available and equivalent
+        compiled_pattern = request.matcher(sanitized_text)
+        if compiled_pattern.groups > 1:
+            # findall() would return a tuple of groups per match; the response
+            # schema is a list of strings, so report the whole match instead
+            matches = [m.group(0) for m in compiled_pattern.finditer(sanitized_text)]
+        else:
+            matches = compiled_pattern.findall(sanitized_text)
         
         # Limit number of matches to prevent memory issues
         if len(matches) > 1000:
@@ -315,8 +644,10 @@ async def test_regex(request: models.RegexRequest):
             logger.warning(f"Regex matches truncated to 1000 results")
         
         logger.info(f"Regex test found {len(matches)} matches")
-        return {"matches": matches, "match_count": len(matches)}
+        return ORJSONResponse({"matches": matches, "match_count": len(matches)})
         
+    except HTTPException:
+        raise
     except re.error as e:
         logger.warning(f"Invalid regex pattern: {e}")
         raise HTTPException(
@@ -353,39 +684,13 @@ async def count_words_in_webpage(request: models.UrlRequest):
         HTTPException: If URL cannot be fetched or processed
     """
     try:
-        response = safe_web_request(request.url)
-        
-        # Parse HTML and extract text
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove script, style, and other non-content elements
-        for element in soup(["script", "style", "nav", "footer", "header"]):
-            element.decompose()
-            
-        # Extract and clean text
-        text = soup.get_text(separator=' ', strip=True)
-        
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split())
-        clean_text = ' '.join(chunk for chunk in chunks if chunk)
+        # Serve repeat URLs from the TTL cache
+        key = hashlib.sha256(request.url.encode()).hexdigest()
+        result = _WORD_COUNT_CACHE.get(key)
+        if result is None:
+            result = await _count_words_shared(request.url, key)
         
-        word_count = len(clean_text.split()) if clean_text else 0
-        char_count = len(clean_text)
-        
-        # Extract basic metadata
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else "No title found"
-        
-        logger.info(f"Word count completed for {request.url}: {word_count} words")
-        
-        return {
-            "url": str(request.url),
-            "word_count": word_count,
-            "char_count": char_count,
-            "title": title_text[:200],  # Limit title length
-            "status_code": response.status_code
-        }
+        return ORJSONResponse(result)
         
     except HTTPException:
         raise
@@ -402,7 +707,7 @@ async def count_words_in_webpage(request: models.UrlRequest):
     response_model=models.SummaryResponse, 
     summary="Summarize Text"
 )
-async def summarize_text(request: models.TextSummarizeRequest):
+async def summarize_text(request: models.TextSummarizeRequest, http_request: Request):
     """
     Perform rule-based text summarization.
     
@@ -422,76 +727,15 @@ async def summarize_text(request: models.TextSummarizeRequest):
     try:
         validate_text_length(request.text, 100000)
         
-        # Tokenize sentences
-        sentences = sent_tokenize(request.text)
-        original_sentence_count = len(sentences)
-
-        # Return original text if already short enough
-        if original_sentence_count <= request.sentence_count:
-            return {
-                "original_sentence_count": original_sentence_count, 
-                "summary": request.text.strip(),
-                "summary_sentence_count": original_sentence_count
-            }
-
-        # Calculate word frequencies (excluding stopwords)
-        try:
-            stop_words = set(stopwords.words('english'))
-        except LookupError:
-            # Fallback if stopwords not available
-            stop_words = set()
-            logger.warning("NLTK stopwords not available, using empty set")
-
-        word_frequencies = defaultdict(int)
-        for word in word_tokenize(request.text.lower()):
-            if word.isalnum() and word not in stop_words:
-                word_frequencies[word] += 1
-        
-        # Handle edge case where no valid words found
-        if not word_frequencies:
-            summary = '. '.join(sentences[:request.sentence_count])
-            return {
-                "original_sentence_count": original_sentence_count,
-                "summary": summary,
-                "summary_sentence_count": min(request.sentence_count, original_sentence_count)
-            }
-
-        # Normalize frequencies
-        max_freq = max(word_frequencies.values())
-        for word in word_frequencies.keys():
-            word_frequencies[word] = word_frequencies[word] / max_freq
-
-        # Score sentences based on word frequencies
-        sentence_scores = defaultdict(float)
-        for i, sentence in enumerate(sentences):
-            sentence_word_count = 0
-            for word in word_tokenize(sentence.lower()):
-                if word in word_frequencies:
-                    sentence_scores[i] += word_frequencies[word]
-                    sentence_word_count += 1
-            
-            # Normalize by sentence length to avoid bias toward long sentences
-            if sentence_word_count > 0:
-                sentence_scores[i] = sentence_scores[i] / sentence_word_count
-        
-        # Select top sentences
-        summary_sentences_indices = heapq.nlargest(
-            request.sentence_count, 
-            sentence_scores, 
-            key=sentence_scores.get
-        )
-        
-        # Sort indices to maintain original order
-        summary_sentences_indices.sort()
-        summary = '. '.join([sentences[i] for i in summary_sentences_indices])
-        
-        logger.info(f"Summarized {original_sentence_count} sentences to {len(summary_sentences_indices)}")
-        
-        return {
-            "original_sentence_count": original_sentence_count,
-            "summary": summary,
-            "summary_sentence_count": len(summary_sentences_indices)
-        }
+        # Tokenizing and scoring is CPU-bound; keep it off the event loop
+        pool = getattr(http_request.app.state, "summarize_pool", None)
+        if pool is not None:
+            result = await asyncio.get_running_loop().run_in_executor(
+                pool, summarize_sync, request.text, request.sentence_count
+            )
+        else:
+            result = await run_in_threadpool(summarize_sync, request.text, request.sentence_count)
+        return ORJSONResponse(result)
         
     except LookupError as e:
         logger.error(f"NLTK data not available: {e}")
@@ -3,7 +3,9 @@
 Handles authentication, rate limiting, and security middleware.
 """
 
+import hmac
 import logging
+from typing import Optional
 from fastapi import Security, HTTPException, status
 from fastapi.security import APIKeyHeader
 
@@ -15,45 +17,68 @@
 api_key_header = APIKeyHeader(name="X-RapidAPI-Proxy-Secret", auto_error=False)
 
 
-async def verify_rapidapi_secret(api_key: str = Security(api_key_header)):
+# The secret can't change while the process runs, so encode it once for
+# hmac.compare_digest. Incoming header values are decoded as latin-1 by
+# Starlette, so encoding them back with latin-1 recovers the raw bytes the
+# client sent, with no UTF-8 codec work per request
+_SECRET_BYTES: Optional[bytes] = (
+    settings.rapidapi_proxy_secret.encode("utf-8") if settings.rapidapi_proxy_secret else None
+)
+
+
+async def _always_allow(api_key: str = Security(api_key_header)):
+    """Development mode without a configured secret: every request passes."""
+    return True
+
+
+async def _fail_500(api_key: str = Security(api_key_header)):
+    """No secret configured outside development: refuse every request."""
+    logger.error("API secret not configured on the server")
+    raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="API secret not configured on the server."
+    )
+
+
+def _check_secret(secret: bytes):
+    """Build the dependency that checks requests against ``secret``."""
+    async def check_secret(api_key: str = Security(api_key_header)):
+        # Check if the header was provided and if it matches our secret,
+        # comparing in constant time so timing doesn't leak the secret
+        if not api_key or not hmac.compare_digest(api_key.encode("latin-1"), secret):
+            logger.warning(f"Invalid API key attempt from request")
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid or missing API secret."
+            )
+        
+        logger.debug("API key verification successful")
+        return True
+    
+    return check_secret
+
+
+def _select_verifier():
     """
-    Dependency to verify RapidAPI secret key.
+    Choose how requests are authenticated, once, from the loaded settings.
     
-    This function protects endpoints by checking the incoming request
-    for the correct secret key in the X-RapidAPI-Proxy-Secret header.
+    The settings can't change while the process runs, so rather than
+    re-checking them on every request the dependency is picked up front:
     
-    Args:
-        api_key (str): The API key from the request header
-        
-    Returns:
-        bool: True if authentication is successful
-        
-    Raises:
-        HTTPException: If authentication fails or secret is not configured
+    - development mode with no secret set skips verification,
+    - no secret set otherwise fails every request with a 500,
+    - else the X-RapidAPI-Proxy-Secret header must match the secret (403).
     """
-    # Skip authentication in development mode if no secret is set
-    if settings.is_development and not settings.rapidapi_proxy_secret:
+    if settings.is_development and _SECRET_BYTES is None:
         logger.warning("Development mode: Skipping API key verification")
-        return True
-    
-    # Check if the secret is configured on our server
-    if not settings.rapidapi_proxy_secret:
-        logger.error("API secret not configured on the server")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="API secret not configured on the server."
-        )
-
-    # Check if the header was provided and if it matches our secret
-    if not api_key or api_key != settings.rapidapi_proxy_secret:
-        logger.warning(f"Invalid API key attempt from request")
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Invalid or missing API secret."
-        )
-    
-    logger.debug("API key verification successful")
-    return True
+        return _always_allow
+    if _SECRET_BYTES is None:
+        return _fail_500
+    return _check_secret(_SECRET_BYTES)
+
+
+# Dependency to verify the RapidAPI secret key on protected endpoints
+verify_rapidapi_secret = _select_verifier()
 
 
 async def optional_rapidapi_secret(api_key: str = Security(api_key_header)):
@@ -69,7 +94,7 @@ async def optional_rapidapi_secret(api_key: str = Security(api_key_header)):
     Returns:
         bool: True if authenticated, False if not
     """
-    if not api_key or not settings.rapidapi_proxy_secret:
+    if not api_key or _SECRET_BYTES is None:
         return False
     
-    return api_key == settings.rapidapi_proxy_secret
\ No newline at end of file
+    return hmac.compare_digest(api_key.encode("latin-1"), _SECRET_BYTES)
\ No newline at end of file
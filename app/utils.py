@@ -5,11 +5,48 @@
 
 import re
 import hashlib
+import hmac
+import ipaddress
 import secrets
-from typing import Optional, List
+from functools import lru_cache
+from itertools import accumulate
+from typing import Optional, FrozenSet
 from urllib.parse import urlparse
 
 
+# str.translate tables: unsafe filename characters become '_', and
+# control characters other than \t, \n and \r are deleted
+_UNSAFE_FILENAME_CHARS = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
+# Patterns used on every request, compiled once
+_WHITESPACE = re.compile(r'\s+')
+
+# Regex constructs rejected by validate_regex_safety, fused into one
+# alternation so the pattern is scanned once
+_DANGEROUS_RE = re.compile(
+    r'\(\?\#'     # Embedded comments
+    r'|\(\?\<'    # Lookbehind
+    r'|\(\?\='    # Lookahead
+    r'|\*\+'      # Nested quantifiers
+    r'|\+\*'      # Nested quantifiers
+    r'|\*\*'      # Nested quantifiers
+    r'|\+\+'      # Nested quantifiers
+    r'|\{\d+,\}'  # Large range quantifiers
+    r'|\((?:[^()\\]|\\.)*[+*]\)+[+*{]'  # Quantified group ending in a quantifier, e.g. (a+)+
+)
+_NON_PARENS = re.compile(r'[^()]+')
+_PAREN_STEP = {'(': 1, ')': -1}
+
+# verify_api_key bounds: both key kinds store a 32-byte digest as hex, and
+# longer keys are rejected without hashing
+_HASH_HEX_LENGTH = 64
+_MAX_API_KEY_LENGTH = 1024
+
+# Non-IP hostnames that resolve inside the local network
+_LOCAL_RE = re.compile(r'^\.|\.local(\.|$)')
+
+
 def sanitize_filename(filename: str) -> str:
     """
     Sanitize filename to prevent directory traversal and other attacks.
@@ -27,12 +64,17 @@ def sanitize_filename(filename: str) -> str:
     filename = filename.split("/")[-1].split("\\")[-1]
     
     # Remove or replace dangerous characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = filename.translate(_UNSAFE_FILENAME_CHARS)
     
     # Limit length
     if len(filename) > 255:
-        name, ext = filename.rsplit('.', 1) if '.' in filename else (filename, '')
-        filename = name[:250] + ('.' + ext if ext else '')
+        # Keep a short trailing extension, looking only at the last 10 chars
+        dot = filename.rfind('.', len(filename) - 10)
+        if dot == -1:
+            filename = filename[:255]
+        else:
+            ext = filename[dot:]
+            filename = filename[:255 - len(ext)] + ext
     
     return filename or "unknown"
 
@@ -58,37 +100,35 @@ def validate_url_safety(url: str) -> bool:
         if not parsed.hostname:
             return False
         
-        # Block localhost and private IP ranges
-        hostname = parsed.hostname.lower()
-        
-        # Block localhost variations
-        if hostname in ['localhost', '127.0.0.1', '0.0.0.0', '::1']:
-            return False
-        
-        # Block private IP ranges (basic check)
-        if (hostname.startswith('192.168.') or 
-            hostname.startswith('10.') or 
-            hostname.startswith('172.16.') or
-            hostname.startswith('172.17.') or
-            hostname.startswith('172.18.') or
-            hostname.startswith('172.19.') or
-            hostname.startswith('172.2') or
-            hostname.startswith('172.3') or
-            hostname.startswith('169.254.')):  # Link-local
-            return False
-        
-        # Block other suspicious patterns
-        if (hostname.startswith('.') or 
-            hostname.endswith('.local') or
-            '.local.' in hostname):
-            return False
-        
-        return True
+        # Block localhost, private IP ranges and local network names
+        return _classify_host(parsed.hostname.lower())
         
     except Exception:
         return False
 
 
+@lru_cache(maxsize=1024)
+def _classify_host(hostname: str) -> bool:
+    """Return True if a lowercased hostname is safe for outbound requests."""
+    # Block localhost variations
+    if hostname == 'localhost':
+        return False
+    
+    # Block private, loopback, link-local and other non-public IPs
+    try:
+        ip = ipaddress.ip_address(hostname)
+    except ValueError:
+        ip = None
+    if ip is not None and not ip.is_global:
+        return False
+    
+    # Block other suspicious patterns
+    if _LOCAL_RE.search(hostname):
+        return False
+    
+    return True
+
+
 def generate_secure_token(length: int = 32) -> str:
     """
     Generate a cryptographically secure random token.
@@ -97,18 +137,29 @@ def generate_secure_token(length: int = 32) -> str:
         length: Length of token in bytes
         
     Returns:
-        str: Hex-encoded secure token
+        str: URL-safe base64-encoded secure token
     """
-    return secrets.token_hex(length)
+    return secrets.token_urlsafe(length)
 
 
-def hash_api_key(api_key: str, salt: Optional[str] = None) -> tuple[str, str]:
+def hash_api_key(api_key: str, salt: Optional[str] = None, kind: str = "token") -> tuple[str, str]:
     """
     Hash an API key with salt for secure storage.
     
+    Random tokens (``kind="token"``, e.g. from generate_secure_token) have
+    enough entropy that a single keyed BLAKE2b hash is sufficient; slow key
+    stretching only matters for guessable secrets, so ``kind="password"``
+    uses PBKDF2-HMAC-SHA256 at OWASP's 600,000 iterations.
+    
+    Hashes stored before these kinds existed were PBKDF2-HMAC-SHA256 at
+    100,000 iterations and don't verify under either; check them with
+    ``kind="legacy"`` and rehash the key on its next successful use.
+    
     Args:
         api_key: The API key to hash
-        salt: Optional salt (will generate if not provided)
+        salt: Optional salt, at most 64 bytes (will generate if not provided)
+        kind: "token" for random API keys, "password" for human-chosen secrets,
+            "legacy" for the old PBKDF2-100k scheme
         
     Returns:
         tuple: (hashed_key, salt)
@@ -116,18 +167,10 @@ def hash_api_key(api_key: str, salt: Optional[str] = None) -> tuple[str, str]:
     if salt is None:
         salt = secrets.token_hex(16)
     
-    # Use PBKDF2 for key derivation
-    key_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        api_key.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000  # iterations
-    )
-    
-    return key_hash.hex(), salt
+    return _derive_key(api_key, salt, kind).hex(), salt
 
 
-def verify_api_key(api_key: str, stored_hash: str, salt: str) -> bool:
+def verify_api_key(api_key: str, stored_hash: str, salt: str, kind: str = "token") -> bool:
     """
     Verify an API key against stored hash.
     
@@ -135,12 +178,38 @@ def verify_api_key(api_key: str, stored_hash: str, salt: str) -> bool:
         api_key: The API key to verify
         stored_hash: The stored hash
         salt: The salt used for hashing
+        kind: The kind the key was hashed with (see hash_api_key); use
+            "legacy" for hashes stored by earlier versions
         
     Returns:
         bool: True if key is valid
     """
-    computed_hash, _ = hash_api_key(api_key, salt)
-    return secrets.compare_digest(computed_hash, stored_hash)
+    # Reject malformed hashes and empty or oversized keys before hashing
+    if len(stored_hash) != _HASH_HEX_LENGTH or not api_key or len(api_key) > _MAX_API_KEY_LENGTH:
+        return False
+    try:
+        expected = bytes.fromhex(stored_hash)
+    except ValueError:
+        return False
+    return hmac.compare_digest(_derive_key(api_key, salt, kind), expected)
+
+
+def _derive_key(api_key: str, salt: str, kind: str) -> bytes:
+    """Compute the raw digest for hash_api_key/verify_api_key."""
+    if kind == "token":
+        return hashlib.blake2b(api_key.encode('utf-8'), key=salt.encode('utf-8'), digest_size=32).digest()
+    if kind == "password":
+        # Use PBKDF2 for key derivation
+        return hashlib.pbkdf2_hmac(
+            'sha256',
+            api_key.encode('utf-8'),
+            salt.encode('utf-8'),
+            600000  # iterations
+        )
+    if kind == "legacy":
+        # Original scheme; kept only so previously stored hashes still verify
+        return hashlib.pbkdf2_hmac('sha256', api_key.encode('utf-8'), salt.encode('utf-8'), 100000)
+    raise ValueError(f"Unknown key kind: {kind}")
 
 
 def sanitize_user_input(text: str, max_length: int = 10000) -> str:
@@ -161,21 +230,21 @@ def sanitize_user_input(text: str, max_length: int = 10000) -> str:
     text = text[:max_length]
     
     # Remove null bytes and other control characters
-    text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F]', '', text)
+    text = text.translate(_CONTROL_CHARS)
     
     # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE.sub(' ', text)
     
     return text.strip()
 
 
-def check_content_type_safety(content_type: str, allowed_types: List[str]) -> bool:
+def check_content_type_safety(content_type: str, allowed_types: FrozenSet[str]) -> bool:
     """
-    Check if content type is in allowed list.
+    Check if content type is in allowed set.
     
     Args:
         content_type: The content type to check
-        allowed_types: List of allowed content types
+        allowed_types: Lowercase allowed content types, built once by the caller
         
     Returns:
         bool: True if content type is allowed
@@ -184,9 +253,9 @@ def check_content_type_safety(content_type: str, allowed_types: List[str]) -> bo
         return False
     
     # Normalize content type (remove parameters)
-    content_type = content_type.split(';')[0].strip().lower()
+    content_type = content_type.split(';', 1)[0].strip().lower()
     
-    return content_type in [t.lower() for t in allowed_types]
+    return content_type in allowed_types
 
 
 def validate_regex_safety(pattern: str) -> bool:
@@ -200,35 +269,19 @@ def validate_regex_safety(pattern: str) -> bool:
         bool: True if pattern is considered safe
     """
     # Basic checks for potentially dangerous patterns
-    dangerous_patterns = [
-        r'\(\?\#',  # Embedded comments
-        r'\(\?\<',  # Lookbehind
-        r'\(\?\=',  # Lookahead
-        r'\*\+',    # Nested quantifiers
-        r'\+\*',    # Nested quantifiers
-        r'\*\*',    # Nested quantifiers
-        r'\+\+',    # Nested quantifiers
-        r'\{\d+,\}', # Large range quantifiers
-    ]
-    
-    for dangerous in dangerous_patterns:
-        if re.search(dangerous, pattern):
-            return False
+    if _DANGEROUS_RE.search(pattern):
+        return False
     
     # Check for extremely long patterns
     if len(pattern) > 1000:
         return False
     
-    # Check for excessive nesting
-    nesting_level = 0
+    # Check for excessive nesting; the depth can only exceed the limit
+    # when there are more opening parens than the limit itself
     max_nesting = 10
+    if pattern.count('(') > max_nesting:
+        parens = _NON_PARENS.sub('', pattern)
+        if max(accumulate(map(_PAREN_STEP.__getitem__, parens))) > max_nesting:
+            return False
     
-    for char in pattern:
-        if char == '(':
-            nesting_level += 1
-            if nesting_level > max_nesting:
-                return False
-        elif char == ')':
-            nesting_level -= 1
-    
-    return True
\ No newline at end of file
+    return True
@@ -7,6 +7,6 @@ pip install -r requirements.txt
 
 echo "Downloading NLTK data..."
 # Run NLTK downloader
-python -c "import nltk; nltk.download('punkt'); nltk.download('stopwords')"
+python -m nltk.downloader punkt punkt_tab stopwords
 
 echo "Build complete."
\ No newline at end of file
@@ -5,34 +5,10 @@
 
 import pytest
 import os
-from fastapi.testclient import TestClient
+import httpx
 
 
-def pytest_configure(config):
-    """Configure pytest with test environment variables."""
-    # Set test environment variables
-    os.environ["RAPIDAPI_PROXY_SECRET"] = "test_secret_key"
-    os.environ["FASTAPI_ENV"] = "development"
-    os.environ["DEBUG"] = "true"
-
-
-@pytest.fixture(scope="session")
-def test_client():
-    """Create a test client for the FastAPI app."""
-    from app.main import app
-    return TestClient(app)
-
-
-@pytest.fixture
-def test_headers():
-    """Provide test headers with authentication."""
-    return {"X-RapidAPI-Proxy-Secret": "test_secret_key"}
-
-
-@pytest.fixture
-def sample_markdown():
-    """Provide sample markdown text for testing."""
-    return """
+SAMPLE_MARKDOWN = """
 # Sample Document
 
 This is a **bold** text and this is *italic* text.
@@ -55,11 +31,7 @@ def hello_world():
 | Cell 1   | Cell 2   |
 """
 
-
-@pytest.fixture
-def sample_long_text():
-    """Provide sample long text for summarization testing."""
-    return """
+SAMPLE_LONG_TEXT = """
     Natural language processing (NLP) is a subfield of linguistics, computer science, 
     and artificial intelligence concerned with the interactions between computers and 
     human language. In particular, how to program computers to process and analyze 
@@ -82,4 +54,39 @@ def sample_long_text():
     be a solved problem. However, real progress was much slower, and after the 
     ALPAC report in 1966, which found that ten-year-long research had failed to 
     fulfill the expectations, funding for machine translation was dramatically reduced.
-    """
\ No newline at end of file
+    """
+
+
+def pytest_configure(config):
+    """Configure pytest with test environment variables."""
+    # Set test environment variables
+    os.environ["RAPIDAPI_PROXY_SECRET"] = "test_secret_key"
+    os.environ["FASTAPI_ENV"] = "development"
+    os.environ["DEBUG"] = "true"
+
+
+@pytest.fixture
+async def test_client():
+    """Create an async client that calls the FastAPI app in-process."""
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+@pytest.fixture
+def test_headers():
+    """Provide test headers with authentication."""
+    return {"X-RapidAPI-Proxy-Secret": "test_secret_key"}
+
+
+@pytest.fixture
+def sample_markdown():
+    """Provide sample markdown text for testing."""
+    return SAMPLE_MARKDOWN
+
+
+@pytest.fixture
+def sample_long_text():
+    """Provide sample long text for summarization testing."""
+    return SAMPLE_LONG_TEXT
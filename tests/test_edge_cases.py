@@ -2,29 +2,19 @@
 Test edge cases and additional scenarios for Dev API Vault.
 """
 
+import asyncio
 import pytest
-import json
-from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
-import os
 
-# Set test environment before importing app
-os.environ["RAPIDAPI_PROXY_SECRET"] = "test_secret_key"
-os.environ["FASTAPI_ENV"] = "development"
-
-from app.main import app
-
-client = TestClient(app)
-test_headers = {"X-RapidAPI-Proxy-Secret": "test_secret_key"}
 
 class TestEdgeCases:
     """Test edge cases and additional scenarios."""
     
     # Test Markdown to HTML with XSS attempts
-    def test_markdown_xss_prevention(self):
+    async def test_markdown_xss_prevention(self, test_client, test_headers):
         """Test that XSS attempts in markdown are properly escaped."""
         xss_payload = "<script>alert('XSS')</script>"
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/markdown-to-html",
             json={"markdown_text": xss_payload},
             headers=test_headers
@@ -36,10 +26,10 @@ def test_markdown_xss_prevention(self):
         assert "<script>" not in data["html_content"]
 
     # Test QR Code with special characters
-    def test_qr_code_special_chars(self):
+    async def test_qr_code_special_chars(self, test_client, test_headers):
         """Test QR code generation with special characters."""
         special_text = "!@#$%^&*()_+{}|:\"<>?~`-=[]\\;',./"
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/qr-code",
             json={"data": special_text},
             headers=test_headers
@@ -49,30 +39,26 @@ def test_qr_code_special_chars(self):
         assert data["qr_code_base64"].startswith("data:image/png;base64,")
 
     # Test image upload with large file
-    def test_large_image_upload(self):
+    async def test_large_image_upload(self, test_client, test_headers):
         """Test that large image uploads are rejected."""
         # Create a large file (5.1 MB)
         large_file = b"x" * (5 * 1024 * 1024 + 1)  # 5MB + 1 byte
         
-        with patch("tempfile.NamedTemporaryFile") as mock_temp:
-            mock_temp.return_value.__enter__.return_value = MagicMock()
-            mock_temp.return_value.__enter__.return_value.tell.return_value = 5 * 1024 * 1024 + 1
-            
-            response = client.post(
-                "/api/v1/image-to-base64",
-                files={"file": ("large.png", large_file, "image/png")},
-                headers=test_headers
-            )
-            
-            assert response.status_code == 413  # Payload Too Large
+        response = await test_client.post(
+            "/api/v1/image-to-base64",
+            files={"file": ("large.png", large_file, "image/png")},
+            headers=test_headers
+        )
+        
+        assert response.status_code == 413  # Payload Too Large
 
     # Test regex with potential ReDoS patterns
-    def test_regex_redos_protection(self):
+    async def test_regex_redos_protection(self, test_client, test_headers):
         """Test that potentially dangerous regex patterns are caught."""
         evil_pattern = r"^(a+)+$"
         evil_input = "a" * 1000 + "!"
         
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/regex-tester",
             json={"pattern": evil_pattern, "text": evil_input},
             headers=test_headers
@@ -85,16 +71,17 @@ def test_regex_redos_protection(self):
             assert "matches" in data
 
     # Test word counter with malformed HTML
-    @patch('app.routers.requests.get')
-    def test_word_counter_malformed_html(self, mock_get):
+    @patch('app.routers._SESSION.get')
+    async def test_word_counter_malformed_html(self, mock_get, test_client, test_headers):
         """Test word counter with malformed HTML content."""
         # Mock response with malformed HTML
         mock_response = MagicMock()
         mock_response.text = """<html><body><p>Test content</p><p>More content</body>"""
+        mock_response.content = mock_response.text.encode()
         mock_response.status_code = 200
         mock_get.return_value = mock_response
         
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/word-counter",
             json={"url": "http://example.com"},
             headers=test_headers
@@ -105,7 +92,7 @@ def test_word_counter_malformed_html(self, mock_get):
         assert data["word_count"] > 0
 
     # Test summarizer with non-English text
-    def test_summarizer_non_english(self):
+    async def test_summarizer_non_english(self, test_client, test_headers):
         """Test text summarization with non-English text."""
         spanish_text = """
         El aprendizaje automático es una rama de la inteligencia artificial que se centra en el desarrollo 
@@ -114,7 +101,7 @@ def test_summarizer_non_english(self):
         de voz, la visión por computadora y el procesamiento del lenguaje natural.
         """
         
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/summarize",
             json={"text": spanish_text, "max_sentences": 1},
             headers=test_headers
@@ -126,34 +113,42 @@ def test_summarizer_non_english(self):
         assert len(data["summary"].split(". ")) <= 2  # Should be 1-2 sentences
 
     # Test rate limiting
-    def test_rate_limiting(self):
+    async def test_rate_limiting(self, test_client, test_headers):
         """Test that rate limiting is working."""
-        # Make multiple requests in quick succession
-        for _ in range(15):  # Should be more than the rate limit
-            response = client.get("/", headers=test_headers)
-            
-            # After rate limit is hit, we should get 429
-            if response.status_code == 429:
-                assert "Retry-After" in response.headers
-                break
-        else:
-            # If we get here, rate limiting might not be working
+        from app.config import settings
+        
+        # Fire more concurrent requests than the per-minute limit, from an
+        # address of their own so other tests keep a full bucket
+        headers = {**test_headers, "X-Forwarded-For": "203.0.113.15"}
+        responses = await asyncio.gather(*(
+            test_client.post(
+                "/api/v1/markdown-to-html",
+                json={"markdown_text": "# Test"},
+                headers=headers
+            )
+            for _ in range(settings.rate_limit_requests_per_minute + 1)
+        ))
+        
+        # After rate limit is hit, we should get 429
+        limited = [response for response in responses if response.status_code == 429]
+        if not limited:
             pytest.fail("Rate limiting not triggered")
+        assert "Retry-After" in limited[0].headers
 
     # Test invalid JSON
-    def test_invalid_json(self):
+    async def test_invalid_json(self, test_client, test_headers):
         """Test handling of invalid JSON in request body."""
-        response = client.post(
+        response = await test_client.post(
             "/api/v1/markdown-to-html",
-            content="{"invalid": json",  # Malformed JSON
+            content='{"invalid": json',  # Malformed JSON
             headers={"Content-Type": "application/json", **test_headers}
         )
         assert response.status_code == 422  # Unprocessable Entity
 
     # Test CORS headers
-    def test_cors_headers(self):
+    async def test_cors_headers(self, test_client, test_headers):
         """Test that CORS headers are properly set."""
-        response = client.options(
+        response = await test_client.options(
             "/",
             headers={
                 "Origin": "http://example.com",